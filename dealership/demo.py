@@ -0,0 +1,291 @@
+"""
+My Very Own Car Dealership
+by Matthew Smith-Burlage
+
+Testing functions for the dealership models, kept out of models.py so
+nothing resets the tables just by importing the models.
+
+Note:   To find instantiated test data, start at `populate_data`.
+        To find solutions to requested queries, start at `run_spec_queries`.
+
+        To find out how I actually *did* open my own dealership with my
+            new found expertise just blindly run `open_dealership()`
+            without looking at the code at the bottom of this file. :)
+
+"""
+
+import datetime
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .models import Car, CarModelOption, Color, Dealership, Make, invalidate_red_fords_cache
+
+
+# Seconds to pause between lyrics in open_dealership. Set DEALERSHIP_DEMO_DELAY=0 to skip the pauses (eg in CI).
+DEMO_DELAY = float(os.environ.get('DEALERSHIP_DEMO_DELAY', '2'))
+
+
+@transaction.atomic
+def populate_data():
+    """ Adds test data to all needed models """
+
+    # This could be refactored using for loops to make the code base
+    # a bit smaller, but I've spelled out each car below for clarity.
+
+    # Reset tables
+    reset_models = [Dealership, User, Car, CarModelOption]
+    if connection.vendor == 'postgresql':
+        # Empties the tables outright instead of collecting and deleting every row
+        tables = ', '.join(connection.ops.quote_name(model._meta.db_table) for model in reset_models)
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE TABLE {tables} RESTART IDENTITY CASCADE')
+    else:
+        for model in reset_models:
+            model.objects.all().delete()
+
+    # Define dealership
+    user = User(
+        username='rastley',
+        first_name='Richard',
+        last_name='Astley',
+        email='rastley@aol.com'
+    )
+    user.set_password('NoStrangersToLove123!')
+    user.save()
+
+    dealer = Dealership.objects.create(
+        name="Honest Rick's Car Emporium",
+        tag_line="We will never let you down.",
+        owner=user,
+        year_established=1987,
+    )
+
+    # Define car models
+    # Inserted in one statement. Backends that can't return primary keys from bulk_create
+    # (eg SQLite) have the rows read back (by name) before they're used as foreign keys.
+    pks_returned = connection.features.can_return_rows_from_bulk_insert
+    car_models = CarModelOption.objects.bulk_create([
+        CarModelOption(model_name="Escape", company=Make.FORD),
+        CarModelOption(model_name="Forrester", company=Make.SUBARU),
+        CarModelOption(model_name="Fusion", company=Make.FORD),
+        CarModelOption(model_name="car", company=Make.SMART),
+        CarModelOption(model_name="focus", company=Make.FORD),
+    ])
+    if not pks_returned:
+        saved_models = {car_model.model_name: car_model for car_model in CarModelOption.objects.all()}
+        car_models = [saved_models[car_model.model_name] for car_model in car_models]
+    escape, forrester, fusion, smartcar, focus = car_models
+
+    # Define car1
+    car1 = Car(
+        make=Make.FORD,
+        model=escape,
+        year=2007,
+        color=Color.BLACK,
+        dealership=dealer,
+        mileage=100005,
+        list_price_cents=400000,
+        sold_price_cents=None,
+        sold_date=None
+    )
+
+    # Define car2
+    car2 = Car(
+        make=Make.SUBARU,
+        model=forrester,
+        year=2015,
+        color=Color.GREY,
+        dealership=dealer,
+        mileage=30001,
+        list_price_cents=1458700,
+        sold_price_cents=1458805,
+        sold_date=datetime.date.today() - datetime.timedelta(days=400),  # Comment to test old_dealerships
+    )
+
+    # Define car3
+    car3 = Car(
+        make=Make.FORD,
+        model=fusion,
+        year=2011,
+        color=Color.RED,
+        dealership=dealer,
+        mileage=28302,
+        list_price_cents=1057900,
+        sold_price_cents=None,
+        sold_date=None,
+    )
+
+    # Define car4
+    car4 = Car(
+        make=Make.SMART,
+        model=smartcar,
+        year=2012,
+        color=Color.GREEN,
+        dealership=dealer,
+        mileage=6,
+        list_price_cents=500,  # Yes, this is meant to be $5.00. :)
+        sold_price_cents=499,  # Same as above.
+        sold_date=datetime.date.today() - datetime.timedelta(days=100),  # Comment to test old_dealerships
+    )
+
+    # Define additional cars
+    car5 = Car(
+        make=Make.FORD,
+        model=escape,
+        year=2009,
+        color=Color.RED,
+        dealership=dealer,
+        mileage=20000,
+        list_price_cents=700000,
+    )
+
+    car6 = Car(
+        make=Make.FORD,
+        model=focus,
+        year=2008,
+        color=Color.GREY,
+        dealership=dealer,
+        mileage=130000,
+        list_price_cents=540000,
+    )
+
+    cars = [car1, car2, car3, car4, car5, car6]
+
+    # bulk_create skips save(), so render the display names here
+    for car in cars:
+        car.render_display_name()
+    Car.objects.bulk_create(cars)
+
+    # bulk_create doesn't send save signals either, and dealership ids can be reused after a reset
+    invalidate_red_fords_cache([dealer.pk])
+
+    if not pks_returned:
+        # Read the cars back (in insertion order) so they have primary keys
+        cars = list(Car.objects.select_related('model').order_by('pk'))
+
+    return cars[:4]
+
+
+def run_spec_queries(open_own_dealership=False):
+    """
+    Run the assigned queries front the specification based on the above models
+    If specified, opens own car dealership, per specification :)
+    """
+
+    # Set up test data
+    populate_data()
+
+    # Run the queries
+
+    # "Write a query to find all cars (no matter the dealership) with
+    # mileage below an integer limit (eg 20,000 miles)"
+    # -----------------------------------------------------------
+    mileage_limit = 100000
+    # Only loads the column needed to print each car
+    five_digit_mileage_cars = Car.objects.filter(mileage__lt=mileage_limit).only('display_name')
+
+    # "Write a query to find all dealerships that have more than 3
+    # cars on their lot that were established after 1980."
+    # -----------------------------------------------------------
+    # See DealershipQuerySet.old_dealerships. Each dealership's cars on the lot
+    # are fetched in one extra query instead of one per dealership.
+    old_dealers = Dealership.objects.old_dealerships().with_on_lot_cars()
+
+    # "Write a method for the dealership model that returns only red Fords under
+    # 30,000 miles on their lot, ordered by price descending"
+    # -----------------------------------------------------------
+    dealership = Dealership.objects.first()
+    red_fords_low_mileage = dealership.find_red_fords_under_30000()
+
+    # Print results
+    # Car results are streamed in chunks rather than loaded all at once, since the lot can grow without bound.
+    # (The dealerships aren't, as iterator() would skip their prefetched cars.)
+
+    print("\"Write a query to find all cars (no matter the dealership) "
+          "with mileage below an integer limit (eg 20,000 miles)\"")
+    for car in five_digit_mileage_cars.iterator(chunk_size=2000):
+        print(car)
+
+    print("\"Write a query to find all dealerships that have more than 3 "
+          "cars on their lot that were established after 1980.\"")
+    print(old_dealers)
+
+    print("\"Write a method for the dealership model that returns only red "
+          "Fords under 30,000 miles on their lot, ordered by price descending\"")
+    for car in red_fords_low_mileage:
+        print(car)
+
+    input("Press enter to continue...")
+
+    if open_own_dealership:
+        open_dealership(dealership.name)
+
+
+def run_tests():
+    """ Run some tests. Of course, normally this would be done more methodically in tests.py. """
+
+    cars = populate_data()
+
+    # test list price int to float
+    assert cars[0].list_price == 4000.00
+
+    # test the .is_sold method
+    assert cars[3].is_sold()
+
+    # test moving a car from not sold to sold manually
+    assert not cars[2].is_sold()
+    cars[2].sold_price = 3456.23
+    cars[2].sold_date = datetime.date.today()
+    cars[2].save()
+    assert cars[2].is_sold()
+
+    # test the .sell_car method
+    assert not cars[0].is_sold()
+    cars[0].sell_car(15444.45)
+    assert cars[0].is_sold()
+
+
+def do_all_the_things():
+    run_tests()
+    run_spec_queries(open_own_dealership=True)
+
+
+def open_dealership(dealership_name="Honest Rick's Car Emporium"):
+    """ Opens a car dealership """
+
+    print("\"Open an actual car dealership with your newfound expertise :)\"")
+    name = input("Okay, done. :) Please enter your name: ")
+
+    print("\n\n\n\n")
+
+    print(f'Hello {name}. Welcome to {dealership_name},')
+    time.sleep(DEMO_DELAY / 2)
+    print("where we are...")
+
+    for i in range(0, 3):
+        time.sleep(DEMO_DELAY / 2)
+        print("\n\n")
+
+    print("Never gonna give you up")
+    time.sleep(DEMO_DELAY)
+    print("Never gonna let you down")
+    time.sleep(DEMO_DELAY)
+    print("Never gonna run around ")
+    time.sleep(DEMO_DELAY)
+    print("and hurt you")
+    time.sleep(DEMO_DELAY)
+    print("\nNever gonna make you cry")
+    time.sleep(DEMO_DELAY)
+    print("Never gonna say goodbye")
+    time.sleep(DEMO_DELAY)
+    print("Never gonna tell a lie")
+    time.sleep(DEMO_DELAY)
+    print("and desert you")
+    time.sleep(DEMO_DELAY)
+
+    print("\n")
+
+    print("More info: https://www.youtube.com/watch?v=dQw4w9WgXcQ")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from dealership.demo import populate_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes ALL users, dealerships, cars and car models (and, on PostgreSQL, every row that references a "
+        "user), then fills the tables with the demo data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help="Do not prompt for confirmation before deleting the existing data.",
+        )
+
+    def handle(self, *args, **options):
+        if options['interactive']:
+            confirm = input(
+                "This will DELETE ALL users, dealerships, cars and car models in the database "
+                "and replace them with the demo data.\n"
+                "Are you sure you want to do this?\n\n"
+                "    Type 'yes' to continue, or 'no' to cancel: "
+            )
+            if confirm != 'yes':
+                self.stdout.write("Seeding cancelled.")
+                return
+
+        populate_data()
+        self.stdout.write(self.style.SUCCESS("Demo data loaded."))
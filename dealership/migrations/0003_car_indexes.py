@@ -0,0 +1,29 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0002_dealership_tag_line'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['make', 'color', 'sold_date', 'mileage'], name='dealership__make_id_756c7b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['sold_date', 'mileage'], name='dealership__sold_da_65001d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-list_price_cents'], name='dealership__list_pr_fa13fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(sold_date__isnull=True), fields=['dealership', 'make', 'color', 'mileage'], name='car_on_lot_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:03
+
+from django.db import migrations, models
+
+
+def copy_option_names(apps, schema_editor):
+    Car = apps.get_model('dealership', 'Car')
+    CarMakeOption = apps.get_model('dealership', 'CarMakeOption')
+    CarColorOption = apps.get_model('dealership', 'CarColorOption')
+
+    for make in CarMakeOption.objects.all():
+        Car.objects.filter(make=make).update(make_name=make.company_name)
+    for color in CarColorOption.objects.all():
+        Car.objects.filter(color=color).update(color_name=color.color_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0003_car_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_on_lot_idx',
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='color_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=128),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='make_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=128),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_option_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(sold_date__isnull=True), fields=['dealership', 'make_name', 'color_name', 'mileage'], name='car_on_lot_idx'),
+        ),
+    ]
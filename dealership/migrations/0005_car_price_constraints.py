@@ -0,0 +1,40 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0004_car_denormalized_names'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='list_price_cents',
+            field=models.BigIntegerField(help_text='Listing price from the dealership (in cents).', verbose_name='List Price'),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='mileage',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='sold_price_cents',
+            field=models.BigIntegerField(blank=True, help_text='What the dealership is selling it for (in cents)', null=True, verbose_name='Sold Price'),
+        ),
+        migrations.AddConstraint(
+            model_name='car',
+            constraint=models.CheckConstraint(check=models.Q(mileage__gte=0), name='car_mileage_nonneg'),
+        ),
+        migrations.AddConstraint(
+            model_name='car',
+            constraint=models.CheckConstraint(check=models.Q(list_price_cents__gte=0), name='car_list_price_nonneg'),
+        ),
+        migrations.AddConstraint(
+            model_name='car',
+            constraint=models.CheckConstraint(check=models.Q(('sold_price_cents__gte', 0), ('sold_price_cents__isnull', True), _connector='OR'), name='car_sold_price_nonneg'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0005_car_price_constraints'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_on_lot_idx',
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(sold_date__isnull=True), fields=['dealership', 'make_name', 'color_name', '-list_price_cents', 'mileage'], name='car_on_lot_sorted_idx'),
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:08
+
+from django.db import migrations, models
+
+
+MAKE_CHOICES = [('FORD', 'Ford'), ('SUBARU', 'Subaru'), ('SMART', 'smart')]
+COLOR_CHOICES = [('BLACK', 'Black'), ('GREY', 'Grey'), ('RED', 'Red'), ('GREEN', 'green')]
+
+
+def choice_values(options, name_field, choices):
+    """
+    Maps each option row to the choice with the same name (ignoring case)
+    Raises before anything is written if a row has no matching choice, so its name can be added to the choices first
+    """
+    values_by_name = {label.lower(): value for value, label in choices}
+    values = {}
+    unknown = []
+    for option in options:
+        name = getattr(option, name_field)
+        value = values_by_name.get(name.strip().lower())
+        if value is None:
+            unknown.append(name)
+        else:
+            values[option] = value
+    if unknown:
+        raise ValueError(
+            f"Cannot convert {options.model._meta.object_name} rows {unknown!r} to choices. "
+            f"Expected one of {[label for value, label in choices]!r}."
+        )
+    return values
+
+
+def copy_option_values(apps, schema_editor):
+    """ Stores each make and color option as its matching choice value """
+    Car = apps.get_model('dealership', 'Car')
+    CarModelOption = apps.get_model('dealership', 'CarModelOption')
+    CarMakeOption = apps.get_model('dealership', 'CarMakeOption')
+    CarColorOption = apps.get_model('dealership', 'CarColorOption')
+
+    makes = choice_values(CarMakeOption.objects.all(), 'company_name', MAKE_CHOICES)
+    colors = choice_values(CarColorOption.objects.all(), 'color_name', COLOR_CHOICES)
+
+    for make, value in makes.items():
+        Car.objects.filter(make=make).update(new_make=value)
+        CarModelOption.objects.filter(company=make).update(new_company=value)
+    for color, value in colors.items():
+        Car.objects.filter(color=color).update(new_color=value)
+
+
+class Migration(migrations.Migration):
+    """
+    Replaces the CarMakeOption and CarColorOption tables with Make and Color choices on Car and CarModelOption
+
+    Not reversible: the option tables (and the foreign keys to them) are dropped, so there is nothing to restore
+    them from. Back up the database before applying this if you may need to go back.
+    """
+
+    dependencies = [
+        ('dealership', '0006_car_on_lot_sorted_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='car',
+            name='dealership__make_id_756c7b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_on_lot_sorted_idx',
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='new_make',
+            field=models.CharField(choices=MAKE_CHOICES, default='', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='new_color',
+            field=models.CharField(choices=COLOR_CHOICES, default='', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='carmodeloption',
+            name='new_company',
+            field=models.CharField(choices=MAKE_CHOICES, default='', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_option_values),
+        migrations.RemoveField(
+            model_name='car',
+            name='color_name',
+        ),
+        migrations.RemoveField(
+            model_name='car',
+            name='make_name',
+        ),
+        migrations.RemoveField(
+            model_name='car',
+            name='color',
+        ),
+        migrations.RemoveField(
+            model_name='car',
+            name='make',
+        ),
+        migrations.RemoveField(
+            model_name='carmodeloption',
+            name='company',
+        ),
+        migrations.RenameField(
+            model_name='car',
+            old_name='new_color',
+            new_name='color',
+        ),
+        migrations.RenameField(
+            model_name='car',
+            old_name='new_make',
+            new_name='make',
+        ),
+        migrations.RenameField(
+            model_name='carmodeloption',
+            old_name='new_company',
+            new_name='company',
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='color',
+            field=models.CharField(choices=COLOR_CHOICES, db_index=True, max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='make',
+            field=models.CharField(choices=MAKE_CHOICES, db_index=True, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['make', 'color', 'sold_date', 'mileage'], name='dealership__make_78dda5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(sold_date__isnull=True), fields=['dealership', 'make', 'color', '-list_price_cents', 'mileage'], name='car_on_lot_sorted_idx'),
+        ),
+        migrations.DeleteModel(
+            name='CarColorOption',
+        ),
+        migrations.DeleteModel(
+            name='CarMakeOption',
+        ),
+    ]
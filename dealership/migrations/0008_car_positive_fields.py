@@ -0,0 +1,40 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0007_make_color_choices'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='car',
+            name='car_mileage_nonneg',
+        ),
+        migrations.RemoveConstraint(
+            model_name='car',
+            name='car_list_price_nonneg',
+        ),
+        migrations.RemoveConstraint(
+            model_name='car',
+            name='car_sold_price_nonneg',
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='list_price_cents',
+            field=models.PositiveBigIntegerField(help_text='Listing price from the dealership (in cents).', verbose_name='List Price'),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='mileage',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='sold_price_cents',
+            field=models.PositiveBigIntegerField(blank=True, help_text='What the dealership is selling it for (in cents)', null=True, verbose_name='Sold Price'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:12
+
+from django.db import migrations, models
+
+
+def render_display_names(apps, schema_editor):
+    Car = apps.get_model('dealership', 'Car')
+
+    cars = list(Car.objects.select_related('model'))
+    for car in cars:
+        car.display_name = f"{car.get_make_display()} {car.model.model_name} ({car.year})"
+    Car.objects.bulk_update(cars, ['display_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0008_car_positive_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='display_name',
+            field=models.CharField(default='', editable=False, max_length=200),
+            preserve_default=False,
+        ),
+        migrations.RunPython(render_display_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0009_car_display_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(sold_date__isnull=True), fields=['dealership', 'list_price_cents'], name='car_onlot_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dealership',
+            index=models.Index(fields=['year_established'], name='dealership__year_es_c0c562_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:17
+
+import dealership.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0010_onlot_price_year_established_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='year',
+            field=models.SmallIntegerField(validators=[dealership.models.year_validator]),
+        ),
+        migrations.AlterField(
+            model_name='dealership',
+            name='year_established',
+            field=models.SmallIntegerField(validators=[dealership.models.year_validator]),
+        ),
+    ]
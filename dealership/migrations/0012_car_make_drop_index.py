@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0011_small_year_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='make',
+            field=models.CharField(choices=[('FORD', 'Ford'), ('SUBARU', 'Subaru'), ('SMART', 'smart')], max_length=16),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-15 21:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealership', '0012_car_make_drop_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='car',
+            name='dealership__list_pr_fa13fa_idx',
+        ),
+    ]
@@ -5,15 +5,11 @@ by Matthew Smith-Burlage
 Created: 2/26/2021
 Last Edit: 2/27/2021
 
-A car dealership represented by Django models with some testing functions.
+A car dealership represented by Django models.
 
-Note:   To find implemented models, start on line 48.
-        To find instantiated test data, start on line 183.
-        To find solutions to requested queries, start on line 298.
-
-        To find out how I actually *did* open my own dealership with my
-            new found expertise just blindly run `open_dealership()`
-            without looking at the code on line 382. :)
+Note:   To find implemented models, start at `class Dealership`.
+        To find instantiated test data and solutions to requested queries,
+            see demo.py (or load the data with `manage.py seed_demo`).
 
 """
 
@@ -21,9 +17,38 @@ import datetime
 import time
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Count, When, IntegerField, Case
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.db.models import FloatField, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Cast
+
+
+# How long (in seconds) Dealership.find_red_fords_under_30000(_rows) results are cached
+RED_FORDS_CACHE_TIMEOUT = 300
+
+
+def red_fords_cache_key(dealership_id):
+    return f'red_fords_u30k:{dealership_id}'
+
+
+def red_fords_rows_cache_key(dealership_id):
+    return f'red_fords_u30k_rows:{dealership_id}'
+
+
+# Price helpers
+# Prices are stored as integer cents to avoid floating point imprecision
+
+def cents_to_float(cents):
+    """ Converts an amount in cents to a float (eg 1050 -> 10.5) """
+    return cents / 100
+
+
+def float_to_cents(price):
+    """ Converts a float amount to cents, rounding off any floating point error (eg 0.29 -> 29, not 28) """
+    return round(price * 100)
 
 
 # Model validators
@@ -32,22 +57,74 @@ def is_not_negative(value):
     return value >= 0
 
 
+# Uses Model T release year to be safe, but you could reasonably increase this to be more restrictive.
+EARLIEST_YEAR = 1908
+
+# Assumes cars model year will never more than 1 year out from current year.
+YEARS_OUT = 1
+
+# Only formatted by ValidationError when the message is actually read
+YEAR_ERROR_MESSAGE = "Invalid car year. Must be between %(earliest_year)d and %(latest_year)d."
+
+# Latest valid year and when it expires (from time.monotonic), see year_validator
+_LATEST_YEAR_CACHE = [None, 0.0]
+_LATEST_YEAR_MAX_AGE = 3600
+
+
+def _refresh_latest_year(now):
+    """ Caches the latest valid year until the year changes (or the max age passes, in case the clock moves) """
+    today = datetime.datetime.now()
+    until_next_year = (datetime.datetime(today.year + 1, 1, 1) - today).total_seconds()
+    _LATEST_YEAR_CACHE[:] = [today.year + YEARS_OUT, now + min(until_next_year, _LATEST_YEAR_MAX_AGE)]
+
+
 def year_validator(value):
     """ Validates car year based on some reasonable assumptions """
 
-    # Uses Model T release year to be safe, but you could reasonably increase this to be more restrictive.
-    earliest_year = 1908
+    # Only rechecks today's date when the cached year expires since this runs for every year validated.
+    now = time.monotonic()
+    if _LATEST_YEAR_CACHE[0] is None or now >= _LATEST_YEAR_CACHE[1]:
+        _refresh_latest_year(now)
+    latest_year = _LATEST_YEAR_CACHE[0]
 
-    # Assumes cars model year will never more than 1 year out from current year.
-    years_out = 1
-    latest_year = datetime.date.today().year + years_out
-
-    if not earliest_year <= value <= latest_year:
-        raise ValidationError(f"Invalid car year. Must be between {earliest_year} and {latest_year}.")
+    if not EARLIEST_YEAR <= value <= latest_year:
+        raise ValidationError(YEAR_ERROR_MESSAGE, code='invalid_year',
+                              params={'earliest_year': EARLIEST_YEAR, 'latest_year': latest_year})
 
 # Models
 
 
+class DealershipQuerySet(models.QuerySet):
+    """ QuerySet (and manager) methods for Dealership """
+
+    def old_dealerships(self):
+        """ Dealerships established after 1980 with at least 3 cars on their lot """
+
+        # This query looks for a third car at each dealership
+        # whose sold_date is null (aka still on the lot)
+        # and then filters out dealerships without one (2 or fewer such
+        # cars) and dealerships not established after 1980.
+        # Checking that the third car exists lets the database stop there
+        # instead of counting every car on each lot.
+        # Of course, this could be done as a single line,
+        # but this approach is much more readable.
+        third_car_on_lot = Car.objects.on_lot().filter(dealership=OuterRef('pk')).order_by().values('pk')[2:3]
+        return self.filter(year_established__gt=1980).annotate(
+            third_car_on_lot=Subquery(third_car_on_lot)
+        ).filter(third_car_on_lot__isnull=False)
+
+    def with_on_lot_cars(self):
+        """
+        Prefetches each dealership's unsold cars (and their models) into `on_lot_cars`
+        Takes one extra query in total rather than one per dealership
+        """
+        return self.prefetch_related(Prefetch(
+            'cars',
+            queryset=Car.objects.on_lot().select_related('model'),
+            to_attr='on_lot_cars',
+        ))
+
+
 class Dealership(models.Model):
     """ Tracks each dealership instance """
 
@@ -56,362 +133,358 @@ class Dealership(models.Model):
     owner = models.ForeignKey(User, on_delete=models.PROTECT)
 
     # Uses same year validation as cars for simplicity
-    year_established = models.IntegerField(validators=[year_validator])
+    year_established = models.SmallIntegerField(validators=[year_validator])
+
+    objects = DealershipQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year_established']),
+        ]
+
+    def _red_fords_under_30000(self):
+        """ Unevaluated QuerySet behind the find_red_fords_under_30000 methods """
+
+        # Find cars from this dealership that match the requested criteria
+        # Filter out cars that are not on the lot (aka already sold) and order the rest by list price
+        # Filters on dealership_id rather than going through self.cars, so the cars don't hold on to this
+        # dealership instance (which would otherwise be pickled into every cache entry, prefetches and all)
+        return Car.objects.on_lot().filter(
+            dealership_id=self.pk,
+            make=Make.FORD,
+            color=Color.RED,
+            mileage__lt=30000,
+        ).order_by('-list_price_cents')
 
     def find_red_fords_under_30000(self):
         """
         Finds red fords under 30000 miles that are still on the lot (not sold)
         Returns them in descending order by list price
+
+        The list is cached per dealership and cleared whenever the dealership or one of its cars
+        (including one moved to another dealership) is saved or deleted.
+        Since the whole result is held in memory, use find_red_fords_under_30000_iter for large exports.
         """
 
-        # Find cars from this dealership that match the requested criteria
-        # Filter out cars that are not on the lot (aka already sold) and order the rest by list price
+        key = red_fords_cache_key(self.pk)
+        cars = cache.get(key)
 
-        return self.cars.filter(
-            make__company_name="Ford",
-            color__color_name='Red',
-            mileage__lt=30000,
-            sold_date__isnull=True
-        ).order_by('-list_price_cents')
+        if cars is None:
+            # Join the car model up front so using it does not query per row. Make and color are columns on
+            # the car, and the dealership is filled in below, so neither needs a join.
+            cars = list(self._red_fords_under_30000().select_related('model'))
+            cache.set(key, cars, RED_FORDS_CACHE_TIMEOUT)
+
+        for car in cars:
+            car.dealership = self
+        return cars
+
+    def find_red_fords_under_30000_iter(self, chunk_size=1000):
+        """
+        Same cars as find_red_fords_under_30000, streamed from the database chunk_size rows at a time
+        Not cached, and keeps memory use flat no matter how many cars match
+        """
+        for car in self._red_fords_under_30000().select_related('model').iterator(chunk_size=chunk_size):
+            car.dealership = self
+            yield car
+
+    def find_red_fords_under_30000_rows(self):
+        """
+        Same cars as find_red_fords_under_30000, as dicts of just the columns needed to list them
+        Cheaper to fetch (and cache) than full Car objects when they are only being displayed or serialized
+        Each row's `make` is the company name for display (eg "Ford"), not the stored Make value.
+
+        Cached the same way as find_red_fords_under_30000.
+        """
+
+        key = red_fords_rows_cache_key(self.pk)
+        rows = cache.get(key)
+
+        if rows is None:
+            rows = list(self._red_fords_under_30000().values(
+                'make', 'model__model_name', 'year', 'mileage', 'list_price_cents'
+            ))
+            for row in rows:
+                row['make'] = Make(row['make']).label
+            cache.set(key, rows, RED_FORDS_CACHE_TIMEOUT)
+
+        return rows
 
     # Related fields:)
     # - cars: QuerySet of Car Model objects that belong to the dealership (using `cars.all()`)
+    # - on_lot_cars: list of unsold cars, only when fetched with `Dealership.objects.with_on_lot_cars()`
 
     def __str__(self):
         return self.name
 
 
-class CarMakeOption(models.Model):
-    """ List of options for car maker in Car model """
+class Make(models.TextChoices):
+    """ Options for car maker in Car and CarModelOption models """
 
-    company_name = models.CharField(max_length=128)
+    FORD = 'FORD', 'Ford'
+    SUBARU = 'SUBARU', 'Subaru'
+    SMART = 'SMART', 'smart'
 
-    def __str__(self):
-        return self.company_name
 
+class Color(models.TextChoices):
+    """ Options for car color in Car model """
 
-class CarColorOption(models.Model):
-    """ List of options for car maker in Car model """
-
-    color_name = models.CharField(max_length=128)
-
-    def __str__(self):
-        return self.color_name
+    BLACK = 'BLACK', 'Black'
+    GREY = 'GREY', 'Grey'
+    RED = 'RED', 'Red'
+    GREEN = 'GREEN', 'green'
 
 
 class CarModelOption(models.Model):
     """ List of options for car models in Car model """
 
-    company = models.ForeignKey(CarMakeOption, on_delete=models.CASCADE)
+    company = models.CharField(max_length=16, choices=Make.choices)
     model_name = models.CharField(max_length=128)
 
     def __str__(self):
         return self.model_name
 
 
+class CarQuerySet(models.QuerySet):
+    """ QuerySet (and manager) methods for Car """
+
+    def on_lot(self):
+        """ Cars that have not been sold yet (uses the sold_date indexes) """
+        return self.filter(sold_date__isnull=True)
+
+    def sold(self):
+        """ Cars that have been sold (uses the sold_date indexes) """
+        return self.filter(sold_date__isnull=False)
+
+    def with_prices(self):
+        """
+        Adds list_price_dollars and sold_price_dollars, converted from cents by the database
+        Useful for ordering/filtering by dollar amounts or pulling prices with values()
+        """
+        # Casting first makes this a float division on every backend (PostgreSQL would return Decimals otherwise)
+        return self.annotate(
+            list_price_dollars=Cast('list_price_cents', FloatField()) / 100,
+            sold_price_dollars=Cast('sold_price_cents', FloatField()) / 100,
+        )
+
+
 class Car(models.Model):
     """ Tracks each individual car entry and if it is sold """
 
-    make = models.ForeignKey(CarMakeOption, on_delete=models.PROTECT)
+    # Make and color are stored on the car itself so filtering on them doesn't need a join
+    # No index of its own, as the (make, color, sold_date, mileage) index below already leads with it
+    make = models.CharField(max_length=16, choices=Make.choices)
     model = models.ForeignKey(CarModelOption, on_delete=models.PROTECT)
-    year = models.IntegerField(validators=[year_validator])
-    color = models.ForeignKey(CarColorOption, on_delete=models.PROTECT)
+    year = models.SmallIntegerField(validators=[year_validator])
+    color = models.CharField(max_length=16, choices=Color.choices, db_index=True)
+
+    # Rendered "<make> <model> (<year>)" so printing a car doesn't need its model (set on save)
+    display_name = models.CharField(max_length=200, editable=False)
 
     dealership = models.ForeignKey(Dealership, on_delete=models.CASCADE, related_name='cars')
 
-    mileage = models.IntegerField(validators=[is_not_negative])
-    list_price_cents = models.IntegerField(verbose_name="List Price", validators=[is_not_negative],
-                                           help_text="Listing price from the dealership (in cents).")
-    sold_price_cents = models.IntegerField(verbose_name="Sold Price", null=True, blank=True,
-                                           validators=[is_not_negative],
-                                           help_text="What the dealership is selling it for (in cents)")
+    # Positive field types have the database reject negative values
+    mileage = models.PositiveIntegerField()
+    list_price_cents = models.PositiveBigIntegerField(verbose_name="List Price",
+                                                      help_text="Listing price from the dealership (in cents).")
+    sold_price_cents = models.PositiveBigIntegerField(verbose_name="Sold Price", null=True, blank=True,
+                                                      help_text="What the dealership is selling it for (in cents)")
     sold_date = models.DateField(null=True, blank=True,
                                  help_text="Date the car was sold. No value means the car has not been sold yet.")
 
+    objects = CarQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['make', 'color', 'sold_date', 'mileage']),
+            models.Index(fields=['sold_date', 'mileage']),
+            # Only covers cars still on the lot (not sold), which keeps it small. Ordered by list price
+            # after the equality filters so find_red_fords_under_30000 can read it in order without sorting.
+            models.Index(fields=['dealership', 'make', 'color', '-list_price_cents', 'mileage'],
+                         condition=Q(sold_date__isnull=True), name='car_on_lot_sorted_idx'),
+            models.Index(fields=['dealership', 'list_price_cents'], condition=Q(sold_date__isnull=True),
+                         name='car_onlot_price_idx'),
+        ]
+
     def is_sold(self):
-        """ Method to determine if the car has been sold based on sold_date """
-        return bool(self.sold_date)
+        """
+        Method to determine if the car has been sold based on sold_date
+        To filter a QuerySet by this, use Car.objects.sold() / Car.objects.on_lot()
+        """
+        return self.sold_date is not None
 
     @property
     def sold_price(self):
         """ Return sold price as a float """
-        if self.sold_price_cents:
-            return self.sold_price_cents / 100
+        if self.sold_price_cents is not None:
+            return cents_to_float(self.sold_price_cents)
         else:
             return None
 
     @sold_price.setter
     def sold_price(self, price):
-        """ Set sold price given a float """
+        """ Set sold price given a float (persisted on the next save) """
         if price >= 0:
-            # Convert to integer (as cents) to avoid floating point imprecision
-            self.sold_price_cents = int(price * 100)
-            self.save()
+            self.sold_price_cents = float_to_cents(price)
         else:
             raise ValueError("Price should not be negative.")
 
     @property
     def list_price(self):
         """ Return list price as a float """
-        return self.list_price_cents / 100
+        return cents_to_float(self.list_price_cents)
 
     @list_price.setter
     def list_price(self, price):
-        """ Set sold price given a float """
+        """ Set list price given a float (persisted on the next save) """
         if price >= 0:
-            # Convert to integer (as cents) to avoid floating point imprecision
-            self.list_price_cents = int(price * 100)
-            self.save()
+            self.list_price_cents = float_to_cents(price)
         else:
             raise ValueError("Price should not be negative.")
 
+    # Fields that display_name is rendered from (by attname)
+    DISPLAY_NAME_FIELDS = ('make', 'model_id', 'year')
+
+    # Fields whose stored values are remembered when a car is loaded or saved, so that
+    # changes to them can be spotted without querying the database (see loaded_value)
+    LOADED_VALUE_FIELDS = ('dealership_id',) + DISPLAY_NAME_FIELDS
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        car = super().from_db(db, field_names, values)
+        car._remember_loaded_values()
+        return car
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        self._remember_loaded_values(fields)
+
+    def _remember_loaded_values(self, fields=None):
+        """ Records the current values of LOADED_VALUE_FIELDS (or just those among fields) as the stored ones """
+        loaded_values = self.__dict__.setdefault('_loaded_values', {})
+        for attname in self.LOADED_VALUE_FIELDS:
+            name = self._meta.get_field(attname).name
+            # Deferred fields are missing from __dict__ and stay unknown
+            if attname in self.__dict__ and (fields is None or attname in fields or name in fields):
+                loaded_values[attname] = self.__dict__[attname]
+
+    def loaded_value(self, attname, default=None):
+        """ The value of a LOADED_VALUE_FIELDS field when the car was last loaded or saved (default if unknown) """
+        return self.__dict__.get('_loaded_values', {}).get(attname, default)
+
+    def changed_since_load(self, attnames):
+        """ Whether any of the given LOADED_VALUE_FIELDS differ from (or may differ from) their stored values """
+        unknown = object()
+        return any(getattr(self, attname) != self.loaded_value(attname, unknown) for attname in attnames)
+
+    def save_prices(self):
+        """ Saves just the list and sold prices (eg after using the price setters) """
+        self.save(update_fields=['list_price_cents', 'sold_price_cents'])
+
+    @classmethod
+    def set_list_prices(cls, prices):
+        """
+        Updates many cars' list prices at once, given a dict of car pk to list price (as a float, like list_price)
+        Writes just the list price column in batches rather than saving each car
+        """
+        if not prices:
+            return
+        if any(price < 0 for price in prices.values()):
+            raise ValueError("Price should not be negative.")
+
+        cars = [cls(pk=pk, list_price_cents=float_to_cents(price)) for pk, price in prices.items()]
+        cls.objects.bulk_update(cars, ['list_price_cents'], batch_size=500)
+
+        # bulk_update skips save signals, so clear the red fords caches here
+        dealership_ids = cls.objects.filter(pk__in=prices).values_list('dealership_id', flat=True).distinct()
+        invalidate_red_fords_cache(dealership_ids)
+
     def sell_car(self, sale_price):
         """ Marks car as sold today with price """
         if sale_price >= 0:
-            self.sold_price = sale_price
+            self.sold_price_cents = float_to_cents(sale_price)
             self.sold_date = datetime.date.today()
-            self.save()
-        else:
-            raise ValueError("Price should not be negative.")
-
-    def __str__(self):
-        return f"{self.make} {self.model} ({self.year})"
-
-
-# Testing functions
-
-def populate_data():
-    """ Adds test data to all needed models """
-
-    # This could be refactored using for loops to make the code base
-    # a bit smaller, but I've spelled out each car below for clarity.
-
-    # Reset tables
-    Dealership.objects.all().delete()
-    User.objects.all().delete()
-    Car.objects.all().delete()
-
-    # Define dealership
-    user = User.objects.create(
-        username='rastley',
-        first_name='Richard',
-        last_name='Astley',
-        email='rastley@aol.com'
-    )
-    user.set_password('NoStrangersToLove123!')
-
-    dealer = Dealership.objects.create(
-        name="Honest Rick's Car Emporium",
-        tag_line="We will never let you down.",
-        owner=user,
-        year_established=1987,
-    )
-
-    # Define car1
-    ford = CarMakeOption.objects.create(company_name="Ford")
-    escape = CarModelOption.objects.create(model_name="Escape", company=ford)
-    black = CarColorOption.objects.create(color_name="Black")
-    car1 = Car.objects.create(
-        make=ford,
-        model=escape,
-        year=2007,
-        color=black,
-        dealership=dealer,
-        mileage=100005,
-        list_price_cents=400000,
-        sold_price_cents=None,
-        sold_date=None
-    )
-
-    # Define car2
-    subaru = CarMakeOption.objects.create(company_name="Subaru")
-    forrester = CarModelOption.objects.create(model_name="Forrester", company=subaru)
-    grey = CarColorOption.objects.create(color_name="Grey")
-    car2 = Car.objects.create(
-        make=subaru,
-        model=forrester,
-        year=2015,
-        color=grey,
-        dealership=dealer,
-        mileage=30001,
-        list_price_cents=1458700,
-        sold_price_cents=1458805,
-        sold_date=datetime.date.today() - datetime.timedelta(days=400),  # Comment to test old_dealerships
-    )
-
-    # Define car3
-    fusion = CarModelOption.objects.create(model_name="Fusion", company=ford)
-    red = CarColorOption.objects.create(color_name="Red")
-    car3 = Car.objects.create(
-        make=ford,
-        model=fusion,
-        year=2011,
-        color=red,
-        dealership=dealer,
-        mileage=28302,
-        list_price_cents=1057900,
-        sold_price_cents=None,
-        sold_date=None,
-    )
-
-    # Define car4
-    smart = CarMakeOption.objects.create(company_name='smart')
-    smartcar = CarModelOption.objects.create(model_name="car", company=smart)
-    green = CarColorOption.objects.create(color_name="green")
-    car4 = Car.objects.create(
-        make=smart,
-        model=smartcar,
-        year=2012,
-        color=green,
-        dealership=dealer,
-        mileage=6,
-        list_price_cents=500,  # Yes, this is meant to be $5.00. :)
-        sold_price_cents=499,  # Same as above.
-        sold_date=datetime.date.today() - datetime.timedelta(days=100),  # Comment to test old_dealerships
-    )
-
-    # Define additional cars
-    Car.objects.create(
-        make=ford,
-        model=escape,
-        year=2009,
-        color=red,
-        dealership=dealer,
-        mileage=20000,
-        list_price_cents=700000,
-    )
-
-    focus = CarModelOption.objects.create(model_name="focus", company=ford)
-    Car.objects.create(
-        make=ford,
-        model=focus,
-        year=2008,
-        color=grey,
-        dealership=dealer,
-        mileage=130000,
-        list_price_cents=540000,
-    )
-
-    return [car1, car2, car3, car4]
-
-
-def run_spec_queries(open_own_dealership=False):
-    """
-    Run the assigned queries front the specification based on the above models
-    If specified, opens own car dealership, per specification :)
-    """
-
-    # Set up test data
-    populate_data()
-
-    # Run the queries
-
-    # "Write a query to find all cars (no matter the dealership) with
-    # mileage below an integer limit (eg 20,000 miles)"
-    # -----------------------------------------------------------
-    mileage_limit = 100000
-    five_digit_mileage_cars = Car.objects.filter(mileage__lt=mileage_limit)
-
-    # "Write a query to find all dealerships that have more than 3
-    # cars on their lot that were established after 1980."
-    # -----------------------------------------------------------
-    # This query counts how many cars each dealership has
-    # whose sold_date is null (aka still on the lot)
-    # and then filters out dealerships with 2 or fewer such
-    # cars and dealerships not established after 1980.
-    # Of course, this could be done as a single line,
-    # but this approach is much more readable.
-    cars_on_lot = Count(Case(When(cars__sold_date__isnull=True, then=1), output_field=IntegerField(), ))
-    old_dealers = Dealership.objects.annotate(num_cars=cars_on_lot).filter(year_established__gt=1980, num_cars__gte=3)
-
-    # "Write a method for the dealership model that returns only red Fords under
-    # 30,000 miles on their lot, ordered by price descending"
-    # -----------------------------------------------------------
-    dealership = Dealership.objects.first()
-    red_fords_low_mileage = dealership.find_red_fords_under_30000()
-
-    # Print results
-
-    print("\"Write a query to find all cars (no matter the dealership) "
-          "with mileage below an integer limit (eg 20,000 miles)\"")
-    print(five_digit_mileage_cars)
-
-    print("\"Write a query to find all dealerships that have more than 3 "
-          "cars on their lot that were established after 1980.\"")
-    print(old_dealers)
-
-    print("\"Write a method for the dealership model that returns only red "
-          "Fords under 30,000 miles on their lot, ordered by price descending\"")
-    print(red_fords_low_mileage)
-
-    input("Press enter to continue...")
-
-    if open_own_dealership:
-        open_dealership(dealership.name)
-
-
-def run_tests():
-    """ Run some tests. Of course, normally this would be done more methodically in tests.py. """
-
-    cars = populate_data()
-
-    # test list price int to float
-    assert cars[0].list_price == 4000.00
-
-    # test the .is_sold method
-    assert cars[3].is_sold()
-
-    # test moving a car from not sold to sold manually
-    assert not cars[2].is_sold()
-    cars[2].sold_price = 3456.23
-    cars[2].sold_date = datetime.date.today()
-    cars[2].save()
-    assert cars[2].is_sold()
-
-    # test the .sell_car method
-    assert not cars[0].is_sold()
-    cars[0].sell_car(15444.45)
-    assert cars[0].is_sold()
-
-
-def do_all_the_things():
-    run_tests()
-    run_spec_queries(open_own_dealership=True)
-
-
-def open_dealership(dealership_name="Honest Rick's Car Emporium"):
-    """ Opens a car dealership """
-
-    print("\"Open an actual car dealership with your newfound expertise :)\"")
-    name = input("Okay, done. :) Please enter your name: ")
 
-    print("\n\n\n\n")
+            if self.pk is None:
+                # Not in the database yet, so there is no row to update
+                self.save()
+                return
 
-    print(f'Hello {name}. Welcome to {dealership_name},')
-    time.sleep(1)
-    print("where we are...")
-
-    for i in range(0, 3):
-        time.sleep(1)
-        print("\n\n")
+            # Writes just these two columns. This skips save signals, so the red fords cache is cleared here.
+            Car.objects.filter(pk=self.pk).update(sold_price_cents=self.sold_price_cents, sold_date=self.sold_date)
+            invalidate_red_fords_cache([self.dealership_id])
+        else:
+            raise ValueError("Price should not be negative.")
 
-    print("Never gonna give you up")
-    time.sleep(2)
-    print("Never gonna let you down")
-    time.sleep(2)
-    print("Never gonna run around ")
-    time.sleep(2)
-    print("and hurt you")
-    time.sleep(2)
-    print("\nNever gonna make you cry")
-    time.sleep(2)
-    print("Never gonna say goodbye")
-    time.sleep(2)
-    print("Never gonna tell a lie")
-    time.sleep(2)
-    print("and desert you")
-    time.sleep(2)
+    def render_display_name(self):
+        """ Sets display_name from the make, model and year (done automatically on save) """
+        self.display_name = f"{self.get_make_display()} {self.model} ({self.year})"
 
-    print("\n")
+    def save(self, *args, **kwargs):
+        # Only re-renders display_name when make, model or year changed, since rendering it may fetch the model
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            outdated = self.changed_since_load(self.DISPLAY_NAME_FIELDS)
+        else:
+            update_fields = set(update_fields)
+            saving = [attname for attname in self.DISPLAY_NAME_FIELDS
+                      if {attname, self._meta.get_field(attname).name} & update_fields]
+            outdated = 'display_name' in update_fields or self.changed_since_load(saving)
+
+        if outdated:
+            self.render_display_name()
+            if update_fields is not None:
+                # Partial saves of make, model or year also write the re-rendered name
+                kwargs['update_fields'] = update_fields | {'display_name'}
+        super().save(*args, **kwargs)
+        self._remember_loaded_values(kwargs.get('update_fields'))
 
-    print("More info: https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    def __str__(self):
+        return self.display_name
+
+
+@receiver(post_save, sender=CarModelOption)
+def refresh_car_display_names(sender, instance, created, **kwargs):
+    """ Re-renders Car.display_name when a car model option is renamed """
+    if not created:
+        cars = list(instance.car_set.all())
+        for car in cars:
+            car.model = instance
+            car.render_display_name()
+        Car.objects.bulk_update(cars, ['display_name'])
+        invalidate_red_fords_cache({car.dealership_id for car in cars})
+
+
+@receiver(pre_save, sender=Car)
+def clear_previous_dealership_red_fords_cache(sender, instance, update_fields=None, **kwargs):
+    """ Drops the cached red fords for the dealership a car is being moved away from """
+    if instance.pk is None or (update_fields is not None and not {'dealership', 'dealership_id'} & update_fields):
+        return
+    previous_id = instance.loaded_value('dealership_id')
+    if previous_id is None:
+        # Only for cars that weren't loaded from the database (eg built with a pk by hand)
+        previous_id = Car.objects.filter(pk=instance.pk).values_list('dealership_id', flat=True).first()
+    if previous_id is not None and previous_id != instance.dealership_id:
+        invalidate_red_fords_cache([previous_id])
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def clear_red_fords_cache(sender, instance, **kwargs):
+    """ Drops the cached red fords for the car's dealership, as the car may have joined or left them """
+    invalidate_red_fords_cache([instance.dealership_id])
+
+
+@receiver(post_save, sender=Dealership)
+@receiver(post_delete, sender=Dealership)
+def clear_dealership_red_fords_cache(sender, instance, **kwargs):
+    """ Drops the dealership's cached red fords so they don't outlive changes to it """
+    invalidate_red_fords_cache([instance.pk])
+
+
+def invalidate_red_fords_cache(dealership_ids):
+    """ Drops the cached Dealership.find_red_fords_under_30000(_rows) results for the given dealerships """
+    keys = []
+    for dealership_id in dealership_ids:
+        keys += [red_fords_cache_key(dealership_id), red_fords_rows_cache_key(dealership_id)]
+    cache.delete_many(keys)
@@ -1,3 +1,291 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
+
+from .demo import populate_data
+from .models import Car, Dealership, year_validator
+
+
+class FindRedFordsTests(TestCase):
+    """ Tests for Dealership.find_red_fords_under_30000 """
+
+    def setUp(self):
+        populate_data()
+        self.dealership = Dealership.objects.get()
+
+    def test_finds_only_red_fords_on_lot(self):
+        cars = list(self.dealership.find_red_fords_under_30000())
+
+        self.assertEqual([car.list_price_cents for car in cars], [1057900, 700000])
+
+    def test_single_query_including_str(self):
+        with self.assertNumQueries(1):
+            [str(car) for car in self.dealership.find_red_fords_under_30000()]
+
+    def test_single_query_including_related_fields(self):
+        with self.assertNumQueries(1):
+            for car in self.dealership.find_red_fords_under_30000():
+                car.get_make_display(), car.get_color_display(), car.model.model_name, car.dealership.name
+
+    @skipUnless(connection.vendor == 'sqlite', "Checks SQLite's query plan output")
+    def test_reads_sorted_on_lot_index(self):
+        plan = self.dealership._red_fords_under_30000().explain()
+
+        self.assertIn('USING INDEX car_on_lot_sorted_idx', plan)
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_cached_until_a_car_changes(self):
+        cars = self.dealership.find_red_fords_under_30000()
+
+        with self.assertNumQueries(0):
+            self.dealership.find_red_fords_under_30000()
+
+        cars[0].sell_car(10000)
+
+        self.assertEqual([car.list_price_cents for car in self.dealership.find_red_fords_under_30000()], [700000])
+
+    def test_rows_cached_until_a_car_changes(self):
+        rows = self.dealership.find_red_fords_under_30000_rows()
+
+        self.assertEqual([row['model__model_name'] for row in rows], ['Fusion', 'Escape'])
+        with self.assertNumQueries(0):
+            self.dealership.find_red_fords_under_30000_rows()
+
+        self.dealership.cars.get(model__model_name='Fusion').sell_car(10000)
+
+        self.assertEqual([row['model__model_name'] for row in self.dealership.find_red_fords_under_30000_rows()],
+                         ['Escape'])
+
+    def test_rows_hold_display_values(self):
+        fusion = self.dealership.find_red_fords_under_30000()[0]
+
+        self.assertEqual(self.dealership.find_red_fords_under_30000_rows()[0], {
+            'make': 'Ford',
+            'model__model_name': 'Fusion',
+            'year': fusion.year,
+            'mileage': fusion.mileage,
+            'list_price_cents': 1057900,
+        })
+
+    def test_cache_cleared_when_a_car_moves_dealership(self):
+        other = Dealership.objects.create(name="Other Lot", owner=self.dealership.owner, year_established=1999)
+        fusion, escape = self.dealership.find_red_fords_under_30000()
+        self.dealership.find_red_fords_under_30000_rows()
+
+        fusion.dealership = other
+        fusion.save()
+
+        self.assertEqual([car.pk for car in self.dealership.find_red_fords_under_30000()], [escape.pk])
+        self.assertEqual([row['model__model_name'] for row in self.dealership.find_red_fords_under_30000_rows()],
+                         ['Escape'])
+        self.assertEqual([car.pk for car in other.find_red_fords_under_30000()], [fusion.pk])
+
+    def test_saving_a_car_does_not_look_up_its_dealership(self):
+        car = Car.objects.get(model__model_name='Fusion')
+        car.mileage += 1
+
+        with self.assertNumQueries(1):
+            car.save()
+
+    def test_cached_cars_use_current_dealership(self):
+        self.dealership.find_red_fords_under_30000()
+
+        self.dealership.name = "Renamed Lot"
+        self.dealership.save()
+        dealership = Dealership.objects.get()
+
+        self.assertEqual({car.dealership.name for car in dealership.find_red_fords_under_30000()}, {"Renamed Lot"})
+
+
+class CarConstraintTests(TestCase):
+    """ Tests for the database constraints on Car """
+
+    def setUp(self):
+        self.car = populate_data()[0]
+
+    def test_negative_list_price_rejected(self):
+        self.car.list_price_cents = -1
+
+        with self.assertRaises(IntegrityError):
+            self.car.save()
+
+
+class DealershipQuerySetTests(TestCase):
+    """ Tests for Dealership.objects methods """
+
+    def setUp(self):
+        populate_data()
+
+    def test_old_dealerships_single_query(self):
+        with self.assertNumQueries(1):
+            dealerships = list(Dealership.objects.old_dealerships())
+
+        self.assertEqual(len(dealerships), 1)
+
+    def test_old_dealerships_needs_three_cars_on_lot(self):
+        dealership = Dealership.objects.get()
+        for car in dealership.cars.on_lot()[:2]:
+            car.sell_car(1000)
+
+        self.assertFalse(Dealership.objects.old_dealerships().exists())
+
+    def test_with_on_lot_cars_prefetches(self):
+        with self.assertNumQueries(2):
+            dealership = Dealership.objects.with_on_lot_cars().get()
+            names = [str(car) for car in dealership.on_lot_cars]
+
+        self.assertCountEqual(names, [
+            'Ford Escape (2007)', 'Ford Fusion (2011)', 'Ford Escape (2009)', 'Ford focus (2008)',
+        ])
+
+
+class CarQuerySetTests(TestCase):
+    """ Tests for Car.objects methods """
+
+    def setUp(self):
+        populate_data()
+
+    def test_with_prices_in_dollars(self):
+        fusion, escape = Dealership.objects.get().find_red_fords_under_30000()
+        fusion.sell_car(9999.99)
+
+        prices = Car.objects.with_prices().in_bulk([fusion.pk, escape.pk])
+
+        self.assertEqual((prices[fusion.pk].list_price_dollars, prices[fusion.pk].sold_price_dollars),
+                         (10579.0, 9999.99))
+        self.assertIsInstance(prices[fusion.pk].sold_price_dollars, float)
+        self.assertEqual((prices[escape.pk].list_price_dollars, prices[escape.pk].sold_price_dollars), (7000.0, None))
+
+
+class CarTests(TestCase):
+    """ Tests for Car methods """
+
+    def setUp(self):
+        populate_data()
+        self.dealership = Dealership.objects.get()
+
+    def test_set_list_prices(self):
+        fusion, escape = self.dealership.find_red_fords_under_30000()
+
+        Car.set_list_prices({fusion.pk: 1000, escape.pk: 2000.29})
+
+        cars = self.dealership.find_red_fords_under_30000()
+        self.assertEqual([(car.pk, car.list_price_cents) for car in cars], [(escape.pk, 200029), (fusion.pk, 100000)])
+
+    def test_set_list_prices_with_nothing_to_set(self):
+        with self.assertNumQueries(0):
+            Car.set_list_prices({})
+
+    def test_price_setters_round_to_nearest_cent(self):
+        car = Car()
+        car.list_price = 0.29
+        car.sold_price = 3456.23
+
+        self.assertEqual((car.list_price_cents, car.sold_price_cents), (29, 345623))
+
+    def test_sell_unsaved_car_saves_it(self):
+        fusion = self.dealership.cars.get(model__model_name='Fusion')
+        car = Car(make=fusion.make, model=fusion.model, year=2020, color=fusion.color, dealership=self.dealership,
+                  mileage=10, list_price_cents=100000)
+
+        car.sell_car(900)
+
+        self.assertEqual(Car.objects.sold().get(pk=car.pk).sold_price_cents, 90000)
+
+    def test_sold_price_of_zero_cents(self):
+        car = Car(sold_price_cents=0)
+
+        self.assertEqual(car.sold_price, 0)
+
+    def test_save_prices_writes_only_prices(self):
+        car = self.dealership.cars.get(model__model_name='Fusion')
+        mileage = car.mileage
+        car.list_price = 12345.67
+        car.sold_price = 0
+        car.mileage = 1
+
+        car.save_prices()
+        car.refresh_from_db()
+
+        self.assertEqual((car.list_price_cents, car.sold_price_cents, car.mileage), (1234567, 0, mileage))
+
+    def test_save_re_renders_display_name_when_year_changes(self):
+        car = self.dealership.cars.get(model__model_name='Fusion')
+        car.year = 2012
+
+        car.save()
+        car.refresh_from_db()
+
+        self.assertEqual(car.display_name, 'Ford Fusion (2012)')
+
+    def test_partial_save_re_renders_display_name(self):
+        car = self.dealership.cars.get(model__model_name='Fusion')
+        car.year = 2012
+
+        car.save(update_fields=['year'])
+        car.refresh_from_db()
+
+        self.assertEqual(car.display_name, 'Ford Fusion (2012)')
+
+
+class SeedDemoCommandTests(TestCase):
+    """ Tests for manage.py seed_demo """
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def test_cancelled_unless_confirmed(self):
+        with mock.patch('builtins.input', return_value='no'):
+            call_command('seed_demo', stdout=StringIO())
+
+        self.assertTrue(User.objects.filter(username='admin').exists())
+        self.assertFalse(Car.objects.exists())
+
+    def test_noinput_loads_demo_data(self):
+        call_command('seed_demo', interactive=False, stdout=StringIO())
+
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['rastley'])
+        self.assertTrue(Car.objects.exists())
+
+
+class YearValidatorTests(SimpleTestCase):
+    """ Tests for year_validator """
+
+    def setUp(self):
+        patcher = mock.patch('dealership.models._LATEST_YEAR_CACHE', [None, 0.0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def validate_at(self, value, now, monotonic):
+        """ Runs year_validator as though it were `now` on the wall clock and `monotonic` on the monotonic one """
+        class FixedDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now
+
+        with mock.patch('dealership.models.datetime', SimpleNamespace(datetime=FixedDatetime)), \
+                mock.patch('dealership.models.time.monotonic', return_value=monotonic):
+            year_validator(value)
+
+    def test_latest_year_expires_at_new_year(self):
+        self.validate_at(2027, datetime.datetime(2026, 12, 31, 23, 30), monotonic=100)
+
+        # Still cached just before midnight (by the monotonic clock), even though the wall clock has moved on
+        with self.assertRaises(ValidationError):
+            self.validate_at(2028, datetime.datetime(2027, 1, 1, 0, 1), monotonic=100 + 1799)
+
+        self.validate_at(2028, datetime.datetime(2027, 1, 1, 0, 1), monotonic=100 + 1800)
+
+    def test_out_of_range_year_message(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.validate_at(1907, datetime.datetime(2026, 6, 1), monotonic=100)
+
+        self.assertEqual(raised.exception.code, 'invalid_year')
+        self.assertEqual(raised.exception.messages, ["Invalid car year. Must be between 1908 and 2027."])